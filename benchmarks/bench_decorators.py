@@ -0,0 +1,33 @@
+import pytest
+
+from memo import memlist, memfunc, memstack, time_taken, ColumnarList
+
+
+def test_bare_call(benchmark, cheap):
+    benchmark(cheap, a=1, b=2)
+
+
+@pytest.mark.parametrize("container", [list, ColumnarList], ids=["list", "columnar"])
+def test_memlist(benchmark, cheap, container):
+    func = memlist(data=container())(cheap)
+    benchmark(func, a=1, b=2)
+
+
+def test_memfunc(benchmark, cheap):
+    func = memfunc(callback=lambda d: None)(cheap)
+    benchmark(func, a=1, b=2)
+
+
+def test_time_taken(benchmark, cheap):
+    func = time_taken()(cheap)
+    benchmark(func, a=1, b=2)
+
+
+def test_stacked(benchmark, cheap):
+    func = memlist(data=[])(memfunc(callback=lambda d: None)(time_taken()(cheap)))
+    benchmark(func, a=1, b=2)
+
+
+def test_fused(benchmark, cheap):
+    func = memstack(sinks=[[], lambda d: None], enrichers=[time_taken()])(cheap)
+    benchmark(func, a=1, b=2)
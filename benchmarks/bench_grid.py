@@ -0,0 +1,21 @@
+import tracemalloc
+
+import pytest
+
+from memo import grid
+
+SIZES = [10, 100, 1_000]
+
+
+@pytest.mark.parametrize("n", SIZES)
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_grid(benchmark, n, shuffle):
+    """Generates a grid of `n * n` settings."""
+    kwargs = dict(a=range(n), b=range(n))
+    tracemalloc.start()
+    grid(shuffle=shuffle, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info["settings"] = n * n
+    benchmark.extra_info["peak_bytes"] = peak
+    benchmark(grid, shuffle=shuffle, **kwargs)
@@ -0,0 +1,41 @@
+import pytest
+
+from memo import memfile
+
+SIZES = [100, 1_000, 10_000]
+
+
+def fill(filepath, n):
+    with open(filepath, "w") as f:
+        for i in range(n):
+            f.write(f'{{"a": {i}, "out": 1}}\n')
+
+
+def test_append(benchmark, cheap, tmp_path):
+    func = memfile(filepath=str(tmp_path / "file.jsonl"))(cheap)
+    benchmark(func, a=1)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_append_skip(benchmark, cheap, tmp_path, n):
+    """Appending a new row with `skip=True` against a file of `n` rows."""
+    filepath = str(tmp_path / "file.jsonl")
+    func = memfile(filepath=filepath, skip=True)(cheap)
+
+    def setup():
+        # Every round appends a row, so the file is rebuilt to stay at `n` rows.
+        fill(filepath, n)
+        return (), {"a": n}
+
+    benchmark.extra_info["rows"] = n
+    benchmark.pedantic(func, setup=setup, rounds=50)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_skip_hit(benchmark, cheap, tmp_path, n):
+    """Skipping a row that is already in a file of `n` rows."""
+    filepath = str(tmp_path / "file.jsonl")
+    fill(filepath, n)
+    func = memfile(filepath=filepath, skip=True)(cheap)
+    benchmark.extra_info["rows"] = n
+    benchmark(func, a=n - 1)
@@ -0,0 +1,86 @@
+import pytest
+from joblib import Parallel, delayed, parallel_backend
+
+from memo import memlist, Runner
+
+BACKENDS = ["threading", "loky", "multiprocessing"]
+N_SETTINGS = 200
+
+
+def cheap_task(a):
+    return {"out": a}
+
+
+def expensive_task(a):
+    return {"out": sum(i * i for i in range(20_000))}
+
+
+TASKS = [cheap_task, expensive_task]
+TASK_IDS = ["cheap", "expensive"]
+
+
+@pytest.mark.parametrize("task", TASKS, ids=TASK_IDS)
+def test_runner(benchmark, task):
+    """
+    `Runner` dispatches with `require="sharedmem"`, which makes joblib fall back to
+    threads for every backend. That's why there's only one case for the runner.
+    """
+    data = []
+    func = memlist(data=data)(task)
+    settings = [{"a": i} for i in range(N_SETTINGS)]
+    runner = Runner(backend="threading", n_jobs=2)
+    benchmark.extra_info["settings"] = N_SETTINGS
+    benchmark.pedantic(
+        runner.run,
+        kwargs=dict(func=func, settings=settings, progbar=False),
+        rounds=3,
+    )
+
+
+def run_parallel(task, settings):
+    with parallel_backend("threading", n_jobs=2):
+        Parallel(require="sharedmem")(delayed(task)(**s) for s in settings)
+
+
+@pytest.mark.benchmark(group="dispatch")
+@pytest.mark.parametrize("how", ["runner", "parallel"])
+def test_dispatch(benchmark, how):
+    """
+    Per-setting overhead of `Runner.run` against the bare `Parallel` call that it
+    wraps, both on the same memlist decorated cheap task. The difference between the
+    two is what memo adds to every dispatched setting.
+    """
+    data = []
+    func = memlist(data=data)(cheap_task)
+    settings = [{"a": i} for i in range(N_SETTINGS)]
+    if how == "runner":
+        runner = Runner(backend="threading", n_jobs=2)
+        target, kwargs = runner.run, dict(func=func, settings=settings, progbar=False)
+    else:
+        target, kwargs = run_parallel, dict(task=func, settings=settings)
+    benchmark.extra_info["settings"] = N_SETTINGS
+    benchmark.pedantic(target, kwargs=kwargs, rounds=5)
+    assert len(data) == 5 * N_SETTINGS
+
+
+def run_backend(backend, task, settings):
+    # Process backends can't share a list with the parent, so the records are
+    # returned and collected here instead.
+    data = []
+    with parallel_backend(backend, n_jobs=2):
+        data.extend(Parallel()(delayed(task)(**s) for s in settings))
+    return data
+
+
+@pytest.mark.benchmark(group="joblib-baseline")
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("task", TASKS, ids=TASK_IDS)
+def test_joblib_baseline(benchmark, backend, task):
+    """
+    Throughput of the joblib backends themselves, processes included. No memo code
+    runs here, this is only a reference for what the backends cost on this machine.
+    """
+    settings = [{"a": i} for i in range(N_SETTINGS)]
+    benchmark.extra_info["settings"] = N_SETTINGS
+    data = benchmark.pedantic(run_backend, args=(backend, task, settings), rounds=3)
+    assert len(data) == N_SETTINGS
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture
+def cheap():
+    def cheap(**kwargs):
+        return {"out": 1}
+
+    return cheap
@@ -1,22 +1,46 @@
 from ._error import NotInstalled
 from ._grid import grid, random_grid
-from ._base import memlist, memfile, memfunc
-from ._runner import Runner
+from ._base import memlist, memfile, memfunc, memstack
+from ._columnar import ColumnarList
+from ._aggregate import Aggregator
+from ._segments import load_memfile
 from ._util import time_taken
 
-try:
-    from memo._http import memweb
-except ModuleNotFoundError:
-    memweb = NotInstalled("memweb", "web")
-
-
 __all__ = [
     "grid",
     "random_grid",
     "memlist",
     "memfile",
     "memfunc",
+    "memstack",
+    "load_memfile",
     "memweb",
     "time_taken",
     "Runner",
+    "ColumnarList",
+    "Aggregator",
+    "WorkQueue",
 ]
+
+
+def __getattr__(name):
+    # `Runner` pulls in joblib/rich, `memweb` pulls in httpx and `WorkQueue` pulls in
+    # sqlite3. These are only imported once they are accessed so that `import memo`
+    # stays fast.
+    if name == "Runner":
+        from ._runner import Runner as value
+    elif name == "WorkQueue":
+        from ._queue import WorkQueue as value
+    elif name == "memweb":
+        try:
+            from ._http import memweb as value
+        except ModuleNotFoundError:
+            value = NotInstalled("memweb", "web")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,252 @@
+import math
+import numbers
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+class _QuantileSketch:
+    """
+    A DDSketch-style quantile sketch. Values are counted in logarithmically sized
+    buckets which gives quantiles with a bounded relative error. The number of
+    buckets is capped, and two sketches merge by adding up their counts.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def _collapse(self, store: Dict[int, int]) -> None:
+        # Merge the buckets closest to zero, this only costs accuracy
+        # for the smallest magnitudes.
+        if len(store) <= self.max_buckets:
+            return
+        keys = sorted(store)
+        n_drop = len(store) - self.max_buckets
+        target = keys[n_drop]
+        for k in keys[:n_drop]:
+            store[target] += store.pop(k)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if value > 0:
+            store, value = self.positive, value
+        elif value < 0:
+            store, value = self.negative, -value
+        else:
+            self.zeros += 1
+            return
+        key = self._key(value)
+        store[key] = store.get(key, 0) + 1
+        self._collapse(store)
+
+    def merge(self, other: "_QuantileSketch") -> None:
+        for store, other_store in [
+            (self.positive, other.positive),
+            (self.negative, other.negative),
+        ]:
+            for k, n in other_store.items():
+                store[k] = store.get(k, 0) + n
+            self._collapse(store)
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive))
+
+
+class _Stats:
+    """
+    Running count, mean, variance, min, max and quantiles of a single value.
+    NaN and infinite values are only counted in `nonfinite`, they'd poison the
+    moments and the sketch can't bucket them.
+    """
+
+    def __init__(self, relative_accuracy: float):
+        self.count = 0
+        self.nonfinite = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = _QuantileSketch(relative_accuracy=relative_accuracy)
+
+    def add(self, value: float) -> None:
+        if not math.isfinite(value):
+            self.nonfinite += 1
+            return
+        # Welford's update
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.sketch.add(value)
+
+    def merge(self, other: "_Stats") -> None:
+        self.nonfinite += other.nonfinite
+        # Chan et al. for combining two sets of running moments
+        n = self.count + other.count
+        if n == 0:
+            return
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta**2 * self.count * other.count / n
+        self.mean += delta * other.count / n
+        self.count = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+
+    @property
+    def var(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+
+class Aggregator:
+    """
+    Keeps streaming summary statistics per group instead of storing every row.
+
+    You can pass it to `memlist` (or to `memstack`) wherever you'd pass a list. For
+    every group of `by` values it keeps the count, mean, variance, min, max and a
+    quantile sketch of every output key. NaN and infinite values are left out of
+    these and counted in `{key}_nonfinite` instead. Memory only grows with the number of
+    groups, not with the number of calls. Aggregators merge, so every worker can
+    keep its own and you combine them at the end.
+
+    Arguments:
+        by: names of the keys that define a group
+        keys: names of the numeric keys to summarise, defaults to every numeric key that isn't in `by`
+        quantiles: quantiles to report, estimated with a relative error of `relative_accuracy`
+        relative_accuracy: relative error of the quantile estimates
+
+    Example
+
+    ```python
+    import numpy as np
+    from memo import memlist, grid, Aggregator
+
+    stats = Aggregator(by=["class_size"], keys=["est_proba"])
+
+    @memlist(data=stats)
+    def birthday_experiment(class_size, n_sim, rep):
+        sims = np.random.randint(1, 365 + 1, (n_sim, class_size))
+        sort_sims = np.sort(sims, axis=1)
+        n_uniq = (sort_sims[:, 1:] != sort_sims[:, :-1]).sum(axis=1) + 1
+        return {"est_proba": np.mean(n_uniq != class_size)}
+
+    for settings in grid(class_size=[5, 10, 20], n_sim=[100], rep=range(20)):
+        birthday_experiment(**settings)
+
+    summary = stats.to_dicts()
+    assert len(summary) == 3
+    assert all(row["est_proba_count"] == 20 for row in summary)
+    ```
+    """
+
+    def __init__(
+        self,
+        by: Iterable[str],
+        keys: Optional[Iterable[str]] = None,
+        quantiles: Sequence[float] = (0.05, 0.5, 0.95),
+        relative_accuracy: float = 0.01,
+    ):
+        self.by = list(by)
+        self.keys = None if keys is None else list(keys)
+        self.quantiles = list(quantiles)
+        self.relative_accuracy = relative_accuracy
+        self._groups: Dict[tuple, Dict[str, _Stats]] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _numeric_keys(self, record: Dict) -> List[str]:
+        numeric = [k for k, v in record.items() if isinstance(v, numbers.Real)]
+        return [k for k in numeric if k not in self.by and type(record[k]) is not bool]
+
+    def append(self, record: Dict) -> None:
+        """Adds a single record to the statistics of its group."""
+        group = tuple(record.get(k) for k in self.by)
+        keys = self.keys if self.keys is not None else self._numeric_keys(record)
+        with self._lock:
+            stats = self._groups.setdefault(group, {})
+            for key in keys:
+                value = record.get(key)
+                if value is None:
+                    continue
+                if key not in stats:
+                    stats[key] = _Stats(self.relative_accuracy)
+                stats[key].add(float(value))
+
+    def merge(self, other: "Aggregator") -> "Aggregator":
+        """Adds the statistics of another aggregator to this one, returns itself."""
+        if other.by != self.by:
+            raise ValueError(
+                "Can only merge aggregators that group `by` the same keys."
+            )
+        with self._lock:
+            for group, other_stats in other._groups.items():
+                stats = self._groups.setdefault(group, {})
+                for key, s in other_stats.items():
+                    if key not in stats:
+                        stats[key] = _Stats(self.relative_accuracy)
+                    stats[key].merge(s)
+        return self
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def __iter__(self):
+        return iter(self.to_dicts())
+
+    def to_dicts(self) -> List[Dict]:
+        """Returns one dictionary with summary statistics per group."""
+        rows = []
+        with self._lock:
+            for group, stats in self._groups.items():
+                row = dict(zip(self.by, group))
+                for key, s in stats.items():
+                    row[f"{key}_count"] = s.count
+                    row[f"{key}_nonfinite"] = s.nonfinite
+                    row[f"{key}_mean"] = s.mean
+                    row[f"{key}_var"] = s.var
+                    row[f"{key}_std"] = math.sqrt(s.var) if s.count > 1 else math.nan
+                    row[f"{key}_min"] = s.min
+                    row[f"{key}_max"] = s.max
+                    for q in self.quantiles:
+                        row[f"{key}_q{round(q * 100):02d}"] = s.sketch.quantile(q)
+                rows.append(row)
+        return rows
@@ -0,0 +1,253 @@
+import math
+import numbers
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+_DTYPES = {"q": "int64", "d": "float64", "b": "bool"}
+
+
+def _kind(value) -> str:
+    """Determines the storage kind of a single value."""
+    t = type(value)
+    if t is float:
+        return "d"
+    if t is bool:
+        return "b"
+    if t is int:
+        return "q"
+    if isinstance(value, numbers.Integral) and not isinstance(value, bool):
+        return "q"
+    if isinstance(value, numbers.Real):
+        return "d"
+    return "O"
+
+
+class _Column:
+    """
+    A single growable column. Numeric values are kept in a typed `array` buffer
+    that doubles in capacity when it runs out of space, everything else is
+    kept in a plain python list.
+    """
+
+    def __init__(self, kind: str, n_missing: int = 0):
+        # A column that appears after the first row needs to be backfilled, ints
+        # and bools can't represent missing values so they're promoted.
+        if n_missing > 0 and kind in ("q", "b"):
+            kind = "d" if kind == "q" else "O"
+        self.kind = kind
+        self.size = 0
+        if kind == "O":
+            self.buf = []
+        else:
+            self.buf = array(kind, bytes(max(16, n_missing) * array(kind).itemsize))
+        for _ in range(n_missing):
+            self.push_missing()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _grow(self) -> None:
+        # We allocate a fresh buffer instead of resizing in place. This keeps any
+        # numpy views that were exported earlier valid.
+        new = array(self.kind, bytes(2 * len(self.buf) * self.buf.itemsize))
+        new[: self.size] = self.buf[: self.size]
+        self.buf = new
+
+    def _promote(self, kind: str) -> None:
+        values = self.values()
+        if kind == "d":
+            values = [math.nan if v is None else float(v) for v in values]
+        self.kind = kind
+        self.size = 0
+        if kind == "O":
+            self.buf = values
+            self.size = len(values)
+        else:
+            self.buf = array(kind, bytes(max(16, len(values)) * array(kind).itemsize))
+            for v in values:
+                self.push(v)
+
+    def push(self, value) -> None:
+        if self.kind == "O":
+            self.buf.append(value)
+            self.size += 1
+            return
+        kind = _kind(value)
+        if kind != self.kind:
+            if self.kind == "d" and kind == "q":
+                value = float(value)
+            elif self.kind == "q" and kind == "d":
+                self._promote("d")
+            else:
+                self._promote("O")
+                return self.push(value)
+        if self.size == len(self.buf):
+            self._grow()
+        try:
+            self.buf[self.size] = value
+        except OverflowError:
+            self._promote("O")
+            return self.push(value)
+        self.size += 1
+
+    def push_missing(self) -> None:
+        if self.kind == "d":
+            if self.size == len(self.buf):
+                self._grow()
+            self.buf[self.size] = math.nan
+            self.size += 1
+            return
+        if self.kind != "O":
+            self._promote("d" if self.kind == "q" else "O")
+            return self.push_missing()
+        self.buf.append(None)
+        self.size += 1
+
+    def get(self, i: int):
+        value = self.buf[i]
+        if self.kind == "b":
+            return bool(value)
+        return value
+
+    def values(self) -> List:
+        if self.kind == "O":
+            return list(self.buf)
+        if self.kind == "b":
+            return [bool(v) for v in self.buf[: self.size]]
+        return self.buf[: self.size].tolist()
+
+    def to_numpy(self):
+        import numpy as np
+
+        if self.kind == "O":
+            arr = np.empty(self.size, dtype=object)
+            arr[:] = self.buf
+            return arr
+        return np.frombuffer(self.buf, dtype=_DTYPES[self.kind], count=self.size)
+
+
+class ColumnarList:
+    """
+    A compact, column-oriented replacement for the list that you pass to `memlist`.
+
+    Instead of keeping a dictionary around for every row, every key gets its own
+    column. Integers, floats and booleans are stored in typed buffers that grow
+    geometrically, other values are kept in a python list. Keys that appear later on
+    are backfilled with `NaN` or `None`, just like you'd see in a dataframe.
+
+    The object still behaves like a list of dictionaries; you can `append`, iterate,
+    index and take the `len` of it. Exporting to numpy via `.to_numpy()` doesn't copy
+    the numeric columns, `.to_pandas()` and `.to_polars()` are available when
+    those libraries are installed.
+
+    Arguments:
+        rows: optional iterable of dictionaries to start with
+
+    Example
+
+    ```python
+    from memo import memlist, ColumnarList
+
+    data = ColumnarList()
+
+    @memlist(data=data)
+    def simulate(a, b):
+        return {"result": a + b}
+
+    for a in range(5):
+        for b in range(10):
+            simulate(a=a, b=b)
+
+    assert len(data) == 50
+    assert data[0] == {"a": 0, "b": 0, "result": 0}
+    assert data.to_numpy()["result"].sum() == 325
+    ```
+    """
+
+    def __init__(self, rows: Optional[Iterable[Dict]] = None):
+        self._columns: Dict[str, _Column] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        if rows is not None:
+            self.extend(rows)
+
+    def append(self, row: Dict) -> None:
+        """Adds a single dictionary as a row."""
+        with self._lock:
+            n = self._size
+            columns = self._columns
+            for key, value in row.items():
+                col = columns.get(key)
+                if col is None:
+                    columns[key] = col = _Column(_kind(value), n_missing=n)
+                col.push(value)
+            if len(row) != len(columns):
+                for col in columns.values():
+                    if col.size == n:
+                        col.push_missing()
+            self._size = n + 1
+
+    def extend(self, rows: Iterable[Dict]) -> None:
+        """Adds multiple dictionaries as rows."""
+        for row in rows:
+            self.append(row)
+
+    @property
+    def columns(self) -> List[str]:
+        """Names of all the columns seen so far."""
+        return list(self._columns.keys())
+
+    def column(self, name: str) -> List:
+        """Returns a single column as a python list."""
+        return self._columns[name].values()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _row(self, i: int) -> Dict:
+        return {k: col.get(i) for k, col in self._columns.items()}
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._row(j) for j in range(*i.indices(self._size))]
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("ColumnarList index out of range")
+        return self._row(i)
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self._row(i)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, ColumnarList)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ColumnarList(rows={self._size}, columns={self.columns})"
+
+    def to_dicts(self) -> List[Dict]:
+        """Returns the data as a list of dictionaries."""
+        return list(self)
+
+    def to_numpy(self) -> Dict:
+        """
+        Returns a dictionary of numpy arrays, one per column. Numeric columns
+        are views on the underlying buffers, so no data is copied.
+        """
+        return {k: col.to_numpy() for k, col in self._columns.items()}
+
+    def to_pandas(self):
+        """Returns the data as a pandas DataFrame."""
+        import pandas as pd
+
+        return pd.DataFrame(self.to_numpy(), copy=False)
+
+    def to_polars(self):
+        """Returns the data as a polars DataFrame."""
+        import polars as pl
+
+        return pl.DataFrame(self.to_numpy())
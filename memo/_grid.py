@@ -1,12 +1,22 @@
 import random
 import itertools as it
+from typing import Optional
 
+from ._util import _derive_seed
 
-def grid(shuffle: bool = True, progbar: bool = None, **kwargs):
+
+def grid(
+    shuffle: bool = True,
+    progbar: bool = None,
+    base_seed: Optional[int] = None,
+    **kwargs,
+):
     """
     Generates a grid of settings.
 
     Arguments:
+        shuffle: shuffle the order of the settings
+        base_seed: when set, every setting gets a `seed` derived from this number and the setting itself, the shuffle also becomes deterministic
         kwargs: the name of parameter is the key while the values represent items to iterate over
 
     Example
@@ -23,7 +33,20 @@ def grid(shuffle: bool = True, progbar: bool = None, **kwargs):
     ]
     assert settings == expected
     ```
+
+    With a `base_seed` every setting gets its own `seed`. The same setting always
+    gets the same seed, no matter the order or the machine it runs on.
+
+    ```python
+    from memo import grid
+
+    settings = grid(a=[1, 2], b=[1, 2], base_seed=42)
+    assert all("seed" in s for s in settings)
+    assert settings == grid(a=[1, 2], b=[1, 2], base_seed=42)
+    ```
     """
+    if base_seed is not None and "seed" in kwargs:
+        raise ValueError("Can't use `base_seed` when the grid already has a `seed`.")
     settings = [
         dict(zip(kwargs.keys(), d)) for d in it.product(*[v for v in kwargs.values()])
     ]
@@ -31,7 +54,11 @@ def grid(shuffle: bool = True, progbar: bool = None, **kwargs):
         raise DeprecationWarning(
             "`progbar` is deprecated, use a `from memo import Runner` to get a progbar."
         )
-    if shuffle:
+    if base_seed is not None:
+        settings = [{**s, "seed": _derive_seed(base_seed, s)} for s in settings]
+        if shuffle:
+            random.Random(base_seed).shuffle(settings)
+    elif shuffle:
         random.shuffle(settings)
     return settings
 
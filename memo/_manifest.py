@@ -0,0 +1,56 @@
+import pathlib
+import threading
+from typing import Dict, Set
+
+from ._util import _hash_settings
+
+
+class Manifest:
+    """
+    Keeps track of which settings have been completed in an append-only file.
+
+    Every line in the file is the hash of a settings dictionary that ran to
+    completion. Reading it back only costs one short line per finished setting,
+    so a restarted sweep never needs to rerun functions or rescan the logs.
+
+    Arguments:
+        filepath: path of the manifest file, created if it does not exist
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        self.done = self._load()
+
+    def _load(self) -> Set[str]:
+        path = pathlib.Path(self.filepath)
+        if not path.exists():
+            return set()
+        with open(path, "r") as f:
+            return {line.strip() for line in f if line.strip() != ""}
+
+    def __contains__(self, settings: Dict) -> bool:
+        return _hash_settings(settings) in self.done
+
+    def __len__(self) -> int:
+        return len(self.done)
+
+    def add(self, settings: Dict) -> None:
+        """Marks a settings dictionary as completed."""
+        key = _hash_settings(settings)
+        with self._lock:
+            if key in self.done:
+                return
+            self.done.add(key)
+            with open(self.filepath, "a") as f:
+                f.write(key + "\n")
+
+    def wrap(self, func):
+        """Wraps a function such that completed calls are recorded."""
+
+        def wrapper(**settings):
+            result = func(**settings)
+            self.add(settings)
+            return result
+
+        return wrapper
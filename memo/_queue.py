@@ -0,0 +1,261 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ._util import _hash_settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    idx INTEGER PRIMARY KEY,
+    key TEXT UNIQUE NOT NULL,
+    settings BLOB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    result BLOB
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_until);
+"""
+
+
+class WorkQueue:
+    """
+    A work queue on top of a SQLite file that lets many worker processes share a sweep.
+
+    The coordinator submits the settings once. Every worker then claims one setting
+    at a time with a lease that it keeps renewing while the function runs. When a
+    worker dies its lease runs out and the setting is handed to another worker.
+    Workers can be started on the same machine or on other machines, as long as
+    they can all reach the file on a filesystem that supports locking.
+
+    A setting is only marked as done by the worker that holds its lease. A worker
+    that stalls longer than the lease (say, during a long pause) loses the setting
+    to another worker and its result is dropped from the queue. The `mem*`
+    decorators on the function run inside the worker though, so in that rare case
+    they can log the setting twice.
+
+    Arguments:
+        path: path to the SQLite file, created if it does not exist
+        lease: seconds that a claimed setting stays reserved without a renewal
+        poll: seconds to wait between checks when all remaining settings are leased
+
+    Usage:
+
+    ```python
+    from memo import memfile, grid, WorkQueue
+
+    @memfile(filepath="results.jsonl")
+    def simulate(a, b):
+        return {"result": a + b}
+
+    # On the coordinator, submitting the same settings twice is a no-op.
+    queue = WorkQueue("sweep.db")
+    queue.submit(grid(a=range(5), b=range(5)))
+
+    # On every worker, this runs until the queue is empty.
+    queue.work(simulate)
+
+    assert queue.progress()["done"] == 25
+    assert len(queue.results()) == 25
+    ```
+    """
+
+    def __init__(self, path: str, lease: float = 60.0, poll: float = 0.1):
+        self.path = path
+        self.lease = lease
+        self.poll = poll
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def __getstate__(self):
+        return {"path": self.path, "lease": self.lease, "poll": self.poll}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def submit(self, settings: Iterable[Dict]) -> int:
+        """Adds settings to the queue, returns how many were new."""
+        import orjson
+
+        rows = [
+            (_hash_settings(s), orjson.dumps(s, option=orjson.OPT_SERIALIZE_NUMPY))
+            for s in settings
+        ]
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (key, settings) VALUES (?, ?)", rows
+            )
+            conn.execute("COMMIT")
+            return conn.total_changes - before
+
+    def claim(self, worker: str) -> Optional[Tuple[int, Dict]]:
+        """Leases the next available setting to a worker, returns `None` if there is none."""
+        import orjson
+
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT idx, settings FROM tasks WHERE status = 'pending' "
+                "OR (status = 'leased' AND lease_until < ?) ORDER BY idx LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE tasks SET status = 'leased', worker = ?, lease_until = ? WHERE idx = ?",
+                    (worker, now + self.lease, row[0]),
+                )
+            conn.execute("COMMIT")
+        if row is None:
+            return None
+        return row[0], orjson.loads(row[1])
+
+    def renew(self, idx: int, worker: str) -> None:
+        """Extends the lease of a setting that a worker is still running."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET lease_until = ? WHERE idx = ? AND worker = ? AND status = 'leased'",
+                (time.time() + self.lease, idx, worker),
+            )
+
+    def complete(self, idx: int, worker: str, record: Optional[Dict] = None) -> bool:
+        """
+        Marks a setting as done and stores the logged record.
+
+        Returns `False` when the worker no longer holds the lease, in that case
+        nothing is changed.
+        """
+        import orjson
+
+        result = None
+        if record is not None:
+            result = orjson.dumps(
+                record, option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+            )
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'done', lease_until = NULL, result = ? "
+                "WHERE idx = ? AND worker = ? AND status = 'leased'",
+                (result, idx, worker),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, idx: int, worker: str, error: str) -> bool:
+        """
+        Marks a setting as failed so that it won't be handed out again.
+
+        Returns `False` when the worker no longer holds the lease, in that case
+        nothing is changed.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'failed', lease_until = NULL, result = ? "
+                "WHERE idx = ? AND worker = ? AND status = 'leased'",
+                (error, idx, worker),
+            )
+            return cursor.rowcount == 1
+
+    def progress(self) -> Dict[str, int]:
+        """Returns the number of settings per status."""
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        with self._connect() as conn:
+            for status, n in conn.execute(
+                "SELECT status, COUNT(*) FROM tasks GROUP BY status"
+            ):
+                counts[status] = n
+        return counts
+
+    def results(self) -> List[Dict]:
+        """Returns the records of all completed settings, in order of submission."""
+        import orjson
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT result FROM tasks WHERE status = 'done' AND result IS NOT NULL ORDER BY idx"
+            ).fetchall()
+        return [orjson.loads(r[0]) for r in rows]
+
+    @contextmanager
+    def _heartbeat(self, idx: int, worker: str):
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.lease / 3):
+                self.renew(idx, worker)
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def work(
+        self,
+        func: Callable,
+        worker: Optional[str] = None,
+        max_tasks: Optional[int] = None,
+        raise_on_error: bool = False,
+    ) -> int:
+        """
+        Keeps claiming and running settings until the queue is empty.
+
+        A setting for which `func` raises is marked as failed with a warning, and the
+        worker moves on to the next one. Failed settings aren't handed out again,
+        `progress()` counts them.
+
+        Arguments:
+            func: the (decorated) function to run for every setting
+            worker: name of this worker, defaults to the hostname, pid and thread
+            max_tasks: stop after running this many settings
+            raise_on_error: stop this worker and re-raise when `func` raises
+
+        Returns the number of settings this worker completed.
+        """
+        if worker is None:
+            worker = f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+        n_done = 0
+        while max_tasks is None or n_done < max_tasks:
+            task = self.claim(worker)
+            if task is None:
+                counts = self.progress()
+                if counts["pending"] + counts["leased"] == 0:
+                    break
+                # Other workers hold the remaining leases, wait in case one dies.
+                time.sleep(self.poll)
+                continue
+            idx, settings = task
+            try:
+                with self._heartbeat(idx, worker):
+                    result = func(**settings)
+            except Exception as e:
+                self.fail(idx, worker, repr(e))
+                if raise_on_error:
+                    raise
+                warnings.warn(f"Setting {idx} failed on worker {worker} with {e!r}.")
+                continue
+            record = {**settings, **result} if isinstance(result, dict) else None
+            if not self.complete(idx, worker, record):
+                warnings.warn(
+                    f"Worker {worker} lost the lease on setting {idx} before it finished, "
+                    "the result is not stored in the queue but sinks of `func` may have logged it."
+                )
+                continue
+            n_done += 1
+        return n_done
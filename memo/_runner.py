@@ -1,11 +1,95 @@
-from typing import Callable, Dict, Iterable, Optional
+from typing import Callable, Dict, Iterable, List, Optional
 from types import GeneratorType
 from joblib import Parallel, delayed, parallel_backend
+from functools import lru_cache
 import joblib.parallel
 from rich.progress import Progress
+import math
+import threading
 import time
 import warnings
 
+from ._manifest import Manifest
+from ._queue import WorkQueue
+from ._util import _derive_seed, _hash_settings
+
+
+class _Welford:
+    """Running count, mean and variance of a single value."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def var(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+
+def _betainc(a: float, b: float, x: float) -> float:
+    """Regularised incomplete beta function, with the continued fraction from Numerical Recipes."""
+    if x <= 0.0 or x >= 1.0:
+        return min(max(x, 0.0), 1.0)
+    if x > (a + 1) / (a + b + 2):
+        return 1.0 - _betainc(b, a, 1.0 - x)
+    log_beta = math.lgamma(a) + math.lgamma(b) - math.lgamma(a + b)
+    front = math.exp(a * math.log(x) + b * math.log(1 - x) - log_beta)
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    f = d
+    for m in range(1, 300):
+        for numerator in [
+            m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+            -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1)),
+        ]:
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            f *= c * d
+        if abs(c * d - 1.0) < 1e-12:
+            break
+    return front * f / a
+
+
+@lru_cache(maxsize=None)
+def _t_quantile(confidence: float, df: int) -> float:
+    """
+    Critical value of a two-sided Student-t interval. The t distribution has heavier
+    tails than the normal for few samples, so the interval doesn't come out too narrow.
+    """
+    # P(|T| > t) equals I_x(df/2, 1/2) with x = df / (df + t^2), which drops with t.
+    alpha = 1 - confidence
+    low, high = 0.0, 1.0
+    while _betainc(df / 2, 0.5, df / (df + high**2)) > alpha:
+        high *= 2
+    for _ in range(100):
+        mid = (low + high) / 2
+        if _betainc(df / 2, 0.5, df / (df + mid**2)) > alpha:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+
+def _with_seed(func: Callable, base_seed: int) -> Callable:
+    """Wraps a function such that every call receives a seed derived from its settings."""
+
+    def wrapper(**settings):
+        if "seed" in settings:
+            return func(**settings)
+        return func(**settings, seed=_derive_seed(base_seed, settings))
+
+    return wrapper
+
 
 class Runner:
     """
@@ -14,12 +98,19 @@ class Runner:
     Arguments:
         backend: choice of parallism backend, can be "loky", "multiprocessing" or "threading"
         n_jobs: degree of parallism, set to -1 to use all available cores
+        base_seed: when set, every call receives a `seed` keyword argument derived from this number and the settings
 
     All keyword arguments during instantiaition will pass through to `parallel_backend`.
     More information on joblib can be found [here](https://joblib.readthedocs.io/en/latest/parallel.html).
     Joblib can also attach to third party backends such as Ray or Apache spark,
     however that functionality has not yet been tested.
 
+    Functions that use global random state, like `np.random`, give results that depend on
+    the order in which the workers pick up tasks. With a `base_seed` the same settings always
+    get the same `seed`, so you can use `np.random.default_rng(seed)` to get results that
+    are reproducible across runs and machines. The seed is logged by the `mem*` decorators
+    just like any other keyword argument. Settings that already have a `seed` are left alone.
+
     Usage:
 
     ```python
@@ -34,12 +125,14 @@ class Runner:
         *args,
         backend: Optional[str] = "loky",
         n_jobs: Optional[int] = None,
+        base_seed: Optional[int] = None,
         **kwargs,
     ):
         self.args = args
         self.kwargs = kwargs
         self.backend = backend
         self.n_jobs = n_jobs
+        self.base_seed = base_seed
 
     def _run(self, func: Callable, settings: Iterable[Dict]) -> None:
         """run the parallel backend
@@ -58,17 +151,30 @@ class Runner:
             ).with_traceback(sys.exc_info()[2])
 
     def run(
-        self, func: Callable, settings: Iterable[Dict], progbar: bool = True
+        self,
+        func: Callable,
+        settings: Iterable[Dict],
+        progbar: bool = True,
+        manifest: Optional[str] = None,
     ) -> None:
         """Run function with joblibs parallel backend
 
         Args:
             func (Callable): The function to be run in parallel.
-            settings (Iterable): An Iterable of Key-value pairs.
+            settings (Iterable): An Iterable of Key-value pairs, or a `WorkQueue` to work on.
             progbar (bool, optional): Show progress bar. Defaults to True.
+            manifest (str, optional): Path to a checkpoint file. Settings that completed
+                in an earlier run are recorded here and won't be dispatched again.
+
+        When `settings` is a `WorkQueue` the runner starts `n_jobs` workers that keep
+        claiming settings from the queue until it is empty. You can run this on as many
+        processes or machines as you like to share a single sweep. The queue keeps track
+        of completed settings itself, so `manifest` can't be used with it and there is
+        no progress bar.
 
         Raises:
             TypeError: When **kwargs doesn't match signature of `parallel_backend`
+            ValueError: When a `manifest` is passed together with a `WorkQueue`
 
         Usage:
 
@@ -97,11 +203,32 @@ class Runner:
         runner.run(func=birthday_experiment, settings=settings)
         ```
         """
+        if self.base_seed is not None:
+            func = _with_seed(func, self.base_seed)
+        if isinstance(settings, WorkQueue):
+            if manifest is not None:
+                raise ValueError(
+                    "A WorkQueue keeps track of completed settings itself, it can't be combined with a manifest."
+                )
+            if progbar:
+                warnings.warn(
+                    "Progress bar not supported for a WorkQueue, use `WorkQueue.progress()` instead"
+                )
+            n_workers = joblib.effective_n_jobs(self.n_jobs)
+            self._run(settings.work, [{"func": func} for _ in range(n_workers)])
+            return
         if not isinstance(
             settings, (list, tuple, set, GeneratorType)
         ):  # check settings is iterable
             raise TypeError(f"Type {type(settings)} not supported")
-        elif progbar and not isinstance(settings, GeneratorType):
+        if manifest is not None:
+            checkpoint = Manifest(manifest)
+            func = checkpoint.wrap(func)
+            remaining = (s for s in settings if s not in checkpoint)
+            if not isinstance(settings, GeneratorType):
+                remaining = list(remaining)
+            settings = remaining
+        if progbar and not isinstance(settings, GeneratorType):
             total = len(settings)
             with Progress() as progress:
                 task = progress.add_task("[red]Runner....", total=total)
@@ -138,3 +265,135 @@ class Runner:
             if isinstance(settings, GeneratorType):
                 warnings.warn("Progress bar not supported for generator settings")
             self._run(func, settings)
+
+    def run_adaptive(
+        self,
+        func: Callable,
+        settings: Iterable[Dict],
+        key: str,
+        tolerance: float,
+        min_repeats: int = 5,
+        max_repeats: int = 100,
+        confidence: float = 0.95,
+        repeat_key: Optional[str] = "repeat",
+    ) -> List[Dict]:
+        """Repeat every setting until the confidence interval of an output is small enough
+
+        Args:
+            func (Callable): The function to be run in parallel, it should output `key`.
+            settings (Iterable): An Iterable of Key-value pairs.
+            key (str): The output to estimate, like `"est_proba"`.
+            tolerance (float): Stop repeating a setting once the half-width of the confidence interval is below this.
+            min_repeats (int, optional): Number of repeats before the interval is checked. Defaults to 5.
+            max_repeats (int, optional): Never repeat a setting more often than this. Defaults to 100.
+            confidence (float, optional): Confidence level of the Student-t interval. Defaults to 0.95.
+            repeat_key (str, optional): Name of the keyword argument that holds the repeat number, so that
+                repeats are logged as separate rows and get their own seed. Set to `None` to leave it out.
+
+        Raises:
+            ValueError: When the settings already contain `repeat_key`
+
+        The settings are run in rounds. Every round only contains the settings that haven't
+        converged yet, so workers that are freed up by converged settings go to the settings
+        that still need more repeats. A round finishes before the next one starts, so a
+        worker that is done early sits idle until the slowest call of its round returns.
+        Every call still goes through the `mem*` decorators on `func`. Calls that don't
+        return a finite `key`, like those skipped by `memfile(skip=True)`, emit a warning
+        and don't count towards the interval. Returns one summary per setting with the number
+        of repeats, the mean, the half-width of the interval and whether it converged.
+
+        Repeats need to be independent. If you seed your function, use the `base_seed`
+        of the `Runner` so that every repeat gets its own seed; a `seed` from
+        `grid(base_seed=...)` is shared by all repeats of a setting.
+
+        Usage:
+
+        ```python
+        import numpy as np
+        from memo import Runner, memlist, grid
+
+        data = []
+
+        @memlist(data=data)
+        def birthday_experiment(class_size, n_sim, repeat):
+            sims = np.random.randint(1, 365 + 1, (n_sim, class_size))
+            sort_sims = np.sort(sims, axis=1)
+            n_uniq = (sort_sims[:, 1:] != sort_sims[:, :-1]).sum(axis=1) + 1
+            return {"est_proba": np.mean(n_uniq != class_size)}
+
+        runner = Runner(backend="threading", n_jobs=-1)
+        summary = runner.run_adaptive(
+            func=birthday_experiment,
+            settings=grid(class_size=[5, 20], n_sim=[100]),
+            key="est_proba",
+            tolerance=0.02,
+            max_repeats=50,
+        )
+        assert len(summary) == 2
+        assert len(data) == sum(s["n_repeats"] for s in summary)
+        ```
+        """
+        settings = list(settings)
+        if repeat_key is not None and any(repeat_key in s for s in settings):
+            raise ValueError(
+                f"Settings already have a `{repeat_key}` key, pick another `repeat_key` or set it to `None`."
+            )
+        stats = {_hash_settings(s): _Welford() for s in settings}
+        dispatched = {h: 0 for h in stats}
+        lock = threading.Lock()
+        if self.base_seed is not None:
+            func = _with_seed(func, self.base_seed)
+
+        def observe(**kwargs):
+            result = func(**kwargs)
+            value = result.get(key) if isinstance(result, dict) else None
+            if value is None or not math.isfinite(value):
+                warnings.warn(
+                    f"No finite `{key}` returned for {kwargs}, the call is left out of the interval."
+                )
+                return result
+            setting = {k: v for k, v in kwargs.items() if k != repeat_key}
+            with lock:
+                stats[_hash_settings(setting)].add(float(value))
+            return result
+
+        def half_width(s):
+            if s.count < 2:
+                return math.inf
+            return _t_quantile(confidence, s.count - 1) * math.sqrt(s.var / s.count)
+
+        def converged(h):
+            s = stats[h]
+            return s.count >= min_repeats and half_width(s) <= tolerance
+
+        def finished(h):
+            return converged(h) or dispatched[h] >= max_repeats
+
+        n_workers = joblib.effective_n_jobs(self.n_jobs)
+        todo = [(_hash_settings(s), s) for s in settings]
+        while todo:
+            # Spread the available workers over the settings that are left.
+            per_setting = max(1, math.ceil(n_workers / len(todo)))
+            tasks = []
+            for h, s in todo:
+                n = min_repeats if dispatched[h] == 0 else per_setting
+                n = min(n, max_repeats - dispatched[h])
+                for r in range(dispatched[h], dispatched[h] + n):
+                    tasks.append({**s, repeat_key: r} if repeat_key else dict(s))
+                dispatched[h] += n
+            self._run(observe, tasks)
+            todo = [(h, s) for h, s in todo if not finished(h)]
+
+        summary = []
+        for s in settings:
+            h = _hash_settings(s)
+            summary.append(
+                {
+                    **s,
+                    "n_repeats": dispatched[h],
+                    f"{key}_mean": stats[h].mean if stats[h].count else math.nan,
+                    f"{key}_ci": half_width(stats[h]),
+                    "converged": converged(h),
+                }
+            )
+        return summary
@@ -0,0 +1,340 @@
+import gzip
+import pathlib
+import re
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover, e.g. on windows
+    fcntl = None
+
+from ._error import NotInstalled
+from ._util import _hash_settings
+
+_SUFFIXES = {"gzip": "gz", "zstd": "zst"}
+
+# Every line in an index is a 16 character hash and a newline.
+_INDEX_LINE = 17
+
+
+def _sealed_segments(path: pathlib.Path) -> List[pathlib.Path]:
+    """Returns the sealed (compressed) segments that belong to a logfile, in order."""
+    pattern = re.compile(re.escape(path.name) + r"\.(\d+)\.(gz|zst)$")
+    found = [p for p in path.parent.glob(path.name + ".*") if pattern.match(p.name)]
+    return sorted(found, key=lambda p: int(pattern.match(p.name).group(1)))
+
+
+def _staged_segments(path: pathlib.Path) -> List[pathlib.Path]:
+    """Returns the segments that are being sealed, these only stay around after a crash."""
+    pattern = re.compile(re.escape(path.name) + r"\.(\d+)\.sealing$")
+    found = [p for p in path.parent.glob(path.name + ".*") if pattern.match(p.name)]
+    return sorted(found, key=lambda p: int(pattern.match(p.name).group(1)))
+
+
+def _segment_number(segment: pathlib.Path) -> int:
+    return int(segment.name.split(".")[-2])
+
+
+def _zstd_dictionary(path: pathlib.Path):
+    import zstandard
+
+    dict_path = path.with_name(path.name + ".dict")
+    if dict_path.exists():
+        return zstandard.ZstdCompressionDict(dict_path.read_bytes())
+    return None
+
+
+def _decompress(segment: pathlib.Path, base: pathlib.Path) -> bytes:
+    data = segment.read_bytes()
+    if segment.suffix == ".gz":
+        return gzip.decompress(data)
+    import zstandard
+
+    dictionary = _zstd_dictionary(base)
+    return zstandard.ZstdDecompressor(dict_data=dictionary).decompress(data)
+
+
+def load_memfile(filepath: str) -> List[Dict]:
+    """
+    Loads all the data that `memfile` wrote to a file, including compressed segments.
+
+    Arguments:
+        filepath: the same filepath that was passed to `memfile`
+
+    Example
+
+    ```python
+    from memo import memfile, load_memfile
+
+    @memfile(filepath="tmpfile-segmented.jsonl", segment_rows=20)
+    def simulate(a, b):
+        return {"result": a + b}
+
+    for a in range(5):
+        for b in range(10):
+            simulate(a=a, b=b)
+
+    assert len(load_memfile("tmpfile-segmented.jsonl")) >= 50
+    ```
+    """
+    import orjson
+
+    path = pathlib.Path(filepath)
+    lines = []
+    sealed = _sealed_segments(path)
+    for segment in sealed:
+        lines.extend(_decompress(segment, path).splitlines())
+    # A seal that was interrupted leaves its rows in a staged file.
+    numbers = {_segment_number(segment) for segment in sealed}
+    for staged in _staged_segments(path):
+        if _segment_number(staged) not in numbers:
+            lines.extend(staged.read_bytes().splitlines())
+    if path.exists():
+        lines.extend(path.read_bytes().splitlines())
+    return [orjson.loads(line) for line in lines if line.strip() != b""]
+
+
+class SegmentedLog:
+    """
+    A jsonl logfile that rotates into compressed segments.
+
+    Rows are appended to `filepath` until it reaches `max_rows` rows or `max_bytes`
+    bytes. The file is then compressed into `{filepath}.{n}.gz` (or `.zst`) and a
+    new one is started. Every segment has an `.idx` sidecar with one hash of the
+    keyword arguments per row, so checking if a call was logged before never
+    needs to decompress anything. With zstd a shared dictionary is trained on the
+    first segment and stored in `{filepath}.dict`.
+
+    Several processes can write to the same log. Writes and rotations hold an
+    OS-level lock on `{filepath}.lock`, and the row counts are read from disk
+    while holding it. On platforms without `fcntl` only threads are kept apart.
+
+    A seal first moves the active segment aside to `{filepath}.{n}.sealing`, then
+    publishes the index and the compressed segment, and removes the staged file as
+    the very last step. When a process dies halfway, the next call finishes the
+    seal, so no rows are lost or logged twice.
+
+    A file that was written by a plain `memfile` has no index yet, neither has a
+    sealed segment whose index went missing. The first call that checks for a
+    match indexes their rows by the keyword arguments of that call.
+
+    Arguments:
+        filepath: path of the active segment
+        max_rows: rotate after this many rows
+        max_bytes: rotate after this many bytes
+        compression: either "gzip" or "zstd", the latter requires `zstandard`
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        compression: str = "gzip",
+    ):
+        if compression not in _SUFFIXES:
+            raise ValueError(f"compression must be one of {list(_SUFFIXES)}")
+        if compression == "zstd":
+            try:
+                import zstandard  # noqa: F401
+            except ModuleNotFoundError:
+                NotInstalled("zstd compression", "zstd")()
+        self.path = pathlib.Path(filepath)
+        self.index_path = self.path.with_name(self.path.name + ".idx")
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self._lock = threading.Lock()
+        self.hashes = set()
+        self._loaded = set()
+        self._active_inode = -1
+        self._active_offset = 0
+        self._missing = set()
+        with self._locked():
+            self._recover()
+            self._unindexed = self.path.exists()
+            self._refresh()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            with open(self.lock_path, "a") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _index_of(self, segment: pathlib.Path) -> pathlib.Path:
+        return segment.with_suffix(".idx")
+
+    def _refresh(self) -> None:
+        """Picks up hashes that were written since the last call, also by other processes."""
+        inode = self.index_path.stat().st_ino if self.index_path.exists() else None
+        if inode != self._active_inode:
+            # The active segment was rotated (or this is the first call), so
+            # there may be sealed segments we haven't seen yet.
+            for segment in _sealed_segments(self.path):
+                if segment.name in self._loaded:
+                    continue
+                if not self._index_of(segment).exists():
+                    # Rebuilt by `_index_segments` once we know the keyword arguments.
+                    self._missing.add(segment)
+                    continue
+                index = self._index_of(segment).read_text().splitlines()
+                self.hashes.update(line for line in index if line != "")
+                self._loaded.add(segment.name)
+            self._active_inode = inode
+            self._active_offset = 0
+        if inode is None:
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._active_offset)
+            new = f.read()
+        new = new[: new.rfind(b"\n") + 1]
+        self._active_offset += len(new)
+        self.hashes.update(line.decode() for line in new.splitlines() if line != b"")
+
+    def _index_existing(self, kwargs: Dict) -> None:
+        """Indexes rows in the active file that have no hash yet, like those of a plain `memfile`."""
+        if not self._unindexed:
+            return
+        import orjson
+
+        self._unindexed = False
+        if not self.path.exists():
+            return
+        rows = [line for line in self.path.read_bytes().splitlines() if line.strip()]
+        n_indexed = self._n_rows()
+        if len(rows) <= n_indexed:
+            return
+        keys = []
+        for line in rows[n_indexed:]:
+            row = orjson.loads(line)
+            keys.append(_hash_settings({k: row.get(k) for k in kwargs}))
+        with open(self.index_path, "a") as f:
+            f.write("".join(k + "\n" for k in keys))
+
+    def _index_segments(self, kwargs: Dict) -> None:
+        """Rebuilds the index of sealed segments that lost theirs by decompressing them."""
+        import orjson
+
+        for segment in sorted(self._missing):
+            index = self._index_of(segment)
+            if not index.exists():
+                lines = _decompress(segment, self.path).splitlines()
+                rows = [orjson.loads(line) for line in lines if line.strip()]
+                keys = [_hash_settings({k: r.get(k) for k in kwargs}) for r in rows]
+                tmp = index.with_name(index.name + ".tmp")
+                tmp.write_text("".join(k + "\n" for k in keys))
+                tmp.rename(index)
+            self.hashes.update(k for k in index.read_text().splitlines() if k != "")
+            self._loaded.add(segment.name)
+        self._missing.clear()
+
+    def _n_rows(self) -> int:
+        if not self.index_path.exists():
+            return 0
+        return self.index_path.stat().st_size // _INDEX_LINE
+
+    def __contains__(self, kwargs: Dict) -> bool:
+        key = _hash_settings(kwargs)
+        with self._locked():
+            self._recover()
+            self._index_existing(kwargs)
+            self._refresh()
+            self._index_segments(kwargs)
+            return key in self.hashes
+
+    def write(self, kwargs: Dict, record: Dict) -> None:
+        """Appends a record that was produced by calling with `kwargs`."""
+        import orjson
+
+        ser = orjson.dumps(
+            record, option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+        )
+        key = _hash_settings(kwargs)
+        with self._locked():
+            self._recover()
+            self._index_existing(kwargs)
+            with open(self.path, "ab") as f:
+                f.write(ser + b"\n")
+            with open(self.index_path, "a") as f:
+                f.write(key + "\n")
+            self.hashes.add(key)
+            # Other processes write too, so the counts come from disk.
+            n_rows, n_bytes = self._n_rows(), self.path.stat().st_size
+            if (self.max_rows and n_rows >= self.max_rows) or (
+                self.max_bytes and n_bytes >= self.max_bytes
+            ):
+                self._seal()
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == "gzip":
+            return gzip.compress(data)
+        import zstandard
+
+        dictionary = _zstd_dictionary(self.path)
+        if dictionary is None:
+            try:
+                dictionary = zstandard.train_dictionary(2**14, data.splitlines())
+                dict_path = self.path.with_name(self.path.name + ".dict")
+                dict_path.write_bytes(dictionary.as_bytes())
+            except zstandard.ZstdError:
+                # Not enough samples to train on, compress without a dictionary.
+                dictionary = None
+        return zstandard.ZstdCompressor(dict_data=dictionary).compress(data)
+
+    def _staged(self, n: int):
+        staged = self.path.with_name(f"{self.path.name}.{n:05d}.sealing")
+        return staged, staged.with_name(staged.name + ".idx")
+
+    def _seal(self) -> None:
+        """Compresses the active segment, the caller needs to hold the lock."""
+        sealed = _sealed_segments(self.path)
+        n = _segment_number(sealed[-1]) + 1 if sealed else 0
+        staged, staged_index = self._staged(n)
+        # The index moves first. Without an active index every call runs
+        # `_recover`, which also handles a crash between these two renames.
+        self.index_path.rename(staged_index)
+        self.path.rename(staged)
+        self._finish_seal(n)
+
+    def _finish_seal(self, n: int) -> None:
+        """Publishes a staged segment, safe to call again after it was interrupted."""
+        staged, staged_index = self._staged(n)
+        name = f"{self.path.name}.{n:05d}.{_SUFFIXES[self.compression]}"
+        segment = self.path.with_name(name)
+        if not segment.exists():
+            index = self._index_of(segment)
+            tmp = index.with_name(index.name + ".tmp")
+            tmp.write_bytes(staged_index.read_bytes())
+            tmp.rename(index)
+            tmp = segment.with_name(segment.name + ".tmp")
+            tmp.write_bytes(self._compress(staged.read_bytes()))
+            tmp.rename(segment)
+        if staged.exists():
+            staged.unlink()
+        staged_index.unlink()
+
+    def _recover(self) -> None:
+        """Finishes seals that were interrupted, the caller needs to hold the lock."""
+        if self.index_path.exists():
+            # A seal always starts by moving the active index aside.
+            return
+        pattern = self.path.name + ".*.sealing.idx"
+        for staged_index in sorted(self.path.parent.glob(pattern)):
+            n = int(staged_index.name.split(".")[-3])
+            staged, _ = self._staged(n)
+            segment = self.path.with_name(
+                f"{self.path.name}.{n:05d}.{_SUFFIXES[self.compression]}"
+            )
+            if not staged.exists() and not segment.exists() and self.path.exists():
+                # The process died between moving the index and the rows aside.
+                self.path.rename(staged)
+            self._finish_seal(n)
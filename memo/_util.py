@@ -1,5 +1,32 @@
 import time
+import hashlib
 from functools import wraps
+from typing import Dict
+
+
+def _hash_settings(settings: Dict) -> str:
+    """
+    Returns a short, order-independent hash of a dictionary of settings.
+
+    The hash needs to be the same across processes and machines, so only values
+    that serialise to json (and numpy arrays) are supported.
+    """
+    import orjson
+
+    option = orjson.OPT_SORT_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+    try:
+        ser = orjson.dumps(settings, option=option)
+    except TypeError as e:
+        raise TypeError(
+            f"Can't hash settings {settings!r}, only json-serialisable values with string keys are supported. {e}"
+        ) from e
+    return hashlib.blake2b(ser, digest_size=8).hexdigest()
+
+
+def _derive_seed(base_seed: int, settings: Dict) -> int:
+    """Derives a 32-bit seed that only depends on a base seed and the settings."""
+    key = f"{base_seed}-{_hash_settings(settings)}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=4).digest(), "little")
 
 
 def time_taken(minutes: bool = False, rounding: int = 2):
@@ -51,4 +78,17 @@ def time_taken(minutes: bool = False, rounding: int = 2):
 
         return wrapper
 
+    # Hooks for `memstack`, which calls these around the function instead of
+    # stacking the decorator, so it only needs to build a single record.
+    def before():
+        return time.perf_counter()
+
+    def after(tic, record):
+        time_total = time.perf_counter() - tic
+        if minutes:
+            time_total = time_total / 60
+        record["time_taken"] = round(time_total, rounding)
+
+    decorator.before = before
+    decorator.after = after
     return decorator
@@ -12,6 +12,8 @@ test_packages = [
     "pre-commit>=2.17.0",
 ] + base_packages
 
+bench_packages = ["pytest-benchmark>=3.2.3"] + test_packages
+
 util_packages = [
     "jupyter>=1.0.0",
     "jupyterlab>=0.35.4",
@@ -25,7 +27,11 @@ docs_packages = [
 
 web_packages = ["httpx>=0.16.1"] + base_packages
 
-dev_packages = util_packages + docs_packages + test_packages + web_packages
+zstd_packages = ["zstandard>=0.15.0"] + base_packages
+
+dev_packages = (
+    util_packages + docs_packages + bench_packages + web_packages + zstd_packages
+)
 
 
 def read(fname):
@@ -41,7 +47,9 @@ setup(
     long_description_content_type="text/markdown",
     extras_require={
         "web": web_packages,
+        "zstd": zstd_packages,
         "test": test_packages,
+        "bench": bench_packages,
         "dev": dev_packages,
     },
     url="https://github.com/koaning/memo",
@@ -0,0 +1,110 @@
+import math
+import pickle
+
+import numpy as np
+import pytest
+
+from memo import memlist, memstack, Aggregator
+
+
+def test_matches_numpy():
+    rng = np.random.default_rng(42)
+    values = {g: rng.normal(loc=g, size=2000) for g in range(3)}
+    agg = Aggregator(by=["g"], quantiles=[0.1, 0.5, 0.9])
+    for g, vals in values.items():
+        for v in vals:
+            agg.append({"g": g, "x": v})
+
+    summary = {row["g"]: row for row in agg.to_dicts()}
+    assert len(agg) == 3
+    for g, vals in values.items():
+        row = summary[g]
+        assert row["x_count"] == 2000
+        assert row["x_mean"] == pytest.approx(vals.mean())
+        assert row["x_var"] == pytest.approx(vals.var(ddof=1))
+        assert row["x_min"] == vals.min()
+        assert row["x_max"] == vals.max()
+        for q in [0.1, 0.5, 0.9]:
+            expected = np.quantile(vals, q)
+            assert row[f"x_q{round(q * 100):02d}"] == pytest.approx(
+                expected, rel=0.05, abs=0.02
+            )
+
+
+def test_merge_equals_single_pass():
+    rows = [{"g": i % 2, "x": float(i), "y": i**2} for i in range(200)]
+    full, left, right = Aggregator(by=["g"]), Aggregator(by=["g"]), Aggregator(by=["g"])
+    for r in rows:
+        full.append(r)
+    for r in rows[:77]:
+        left.append(r)
+    for r in rows[77:]:
+        right.append(r)
+    # Aggregators travel between processes, so they need to survive a pickle.
+    merged = left.merge(pickle.loads(pickle.dumps(right)))
+    for a, b in zip(full.to_dicts(), merged.to_dicts()):
+        assert a.keys() == b.keys()
+        for k in a:
+            assert a[k] == pytest.approx(b[k])
+
+
+def test_as_memlist_sink():
+    agg = Aggregator(by=["a"], keys=["sum"])
+
+    @memlist(data=agg)
+    def count_values(a, b):
+        return {"sum": a + b}
+
+    for a in range(3):
+        for b in range(10):
+            count_values(a=a, b=b)
+
+    rows = agg.to_dicts()
+    assert [r["a"] for r in rows] == [0, 1, 2]
+    assert [r["sum_count"] for r in rows] == [10, 10, 10]
+    assert [r["sum_mean"] for r in rows] == [4.5, 5.5, 6.5]
+    assert "b_mean" not in rows[0]
+
+
+def test_as_memstack_sink():
+    agg, data = Aggregator(by=["a"]), []
+
+    @memstack(sinks=[agg, data])
+    def count_values(a, b):
+        return {"sum": a + b}
+
+    for a in range(3):
+        for b in range(10):
+            count_values(a=a, b=b)
+
+    rows = agg.to_dicts()
+    assert len(data) == 30
+    assert [r["sum_count"] for r in rows] == [10, 10, 10]
+    # Without explicit keys every numeric key outside of `by` is summarised.
+    assert [r["b_mean"] for r in rows] == [4.5, 4.5, 4.5]
+
+
+def test_nonfinite_values_are_counted_apart():
+    agg = Aggregator(by=["a"])
+    for x in [1.0, math.inf, 3.0, math.nan, -math.inf]:
+        agg.append({"a": 1, "x": x})
+    other = Aggregator(by=["a"])
+    other.append({"a": 1, "x": math.nan})
+
+    row = agg.merge(other).to_dicts()[0]
+    assert row["x_count"] == 2
+    assert row["x_nonfinite"] == 4
+    assert row["x_mean"] == 2.0
+    assert (row["x_min"], row["x_max"]) == (1.0, 3.0)
+    assert all(math.isfinite(row[f"x_q{q}"]) for q in ["05", "50", "95"])
+
+
+def test_single_value_variance():
+    agg = Aggregator(by=["a"])
+    agg.append({"a": 1, "x": 1.0})
+    assert math.isnan(agg.to_dicts()[0]["x_var"])
+
+
+def test_merge_needs_same_groups():
+    with pytest.raises(ValueError):
+        Aggregator(by=["a"]).merge(Aggregator(by=["b"]))
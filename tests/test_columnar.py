@@ -0,0 +1,80 @@
+import math
+
+import numpy as np
+import pytest
+
+from memo import memlist, ColumnarList
+
+
+def test_behaves_like_list():
+    data = ColumnarList()
+
+    @memlist(data=data)
+    def count_values(**kwargs):
+        return {"sum": sum(kwargs.values())}
+
+    for i in range(100):
+        count_values(a=i, b=1.5)
+
+    assert len(data) == 100
+    assert data[0] == {"a": 0, "b": 1.5, "sum": 1.5}
+    assert data[-1] == {"a": 99, "b": 1.5, "sum": 100.5}
+    assert data[1:3] == [{"a": 1, "b": 1.5, "sum": 2.5}, {"a": 2, "b": 1.5, "sum": 3.5}]
+    assert [d["a"] for d in data] == list(range(100))
+
+
+def test_skip_works():
+    data = ColumnarList()
+
+    @memlist(data=data, skip=True)
+    def count_values(**kwargs):
+        return {"sum": sum(kwargs.values())}
+
+    count_values(a=1, b=2)
+    count_values(a=1, b=2)
+    assert len(data) == 1
+
+
+def test_to_numpy_zero_copy():
+    data = ColumnarList({"a": i, "b": float(i), "c": i % 2 == 0} for i in range(50))
+    arrays = data.to_numpy()
+    assert arrays["a"].dtype == np.int64
+    assert arrays["b"].dtype == np.float64
+    assert arrays["c"].dtype == bool
+    assert arrays["a"].sum() == sum(range(50))
+    assert not arrays["a"].flags.owndata
+    # Appending after an export must not break the exported views.
+    for i in range(100):
+        data.append({"a": i, "b": 0.0, "c": True})
+    assert len(arrays["a"]) == 50
+    assert len(data.to_numpy()["a"]) == 150
+
+
+@pytest.mark.parametrize(
+    "values, dtype",
+    [
+        ([1, 2.5], np.float64),
+        ([1, "a"], object),
+        ([True, 1], object),
+        ([1, 2**70], object),
+    ],
+)
+def test_type_promotion(values, dtype):
+    data = ColumnarList({"a": v} for v in values)
+    assert data.to_numpy()["a"].dtype == dtype
+    assert data.column("a") == values
+
+
+def test_new_and_missing_keys():
+    data = ColumnarList([{"a": 1}, {"a": 2, "b": 3}, {"a": 3, "c": "x"}])
+    assert data.columns == ["a", "b", "c"]
+    assert data.column("a") == [1, 2, 3]
+    b = data.column("b")
+    assert math.isnan(b[0]) and b[1] == 3 and math.isnan(b[2])
+    assert data.column("c") == [None, None, "x"]
+
+
+def test_index_error():
+    data = ColumnarList([{"a": 1}])
+    with pytest.raises(IndexError):
+        data[1]
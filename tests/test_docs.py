@@ -3,10 +3,36 @@ import pathlib
 import pytest
 
 from mktestdocs import check_md_file, check_docstring, get_codeblock_members
-from memo import memlist, memfunc, memfile, time_taken, grid, random_grid, Runner
+from memo import (
+    memlist,
+    memfunc,
+    memfile,
+    memstack,
+    load_memfile,
+    time_taken,
+    grid,
+    random_grid,
+    Runner,
+    ColumnarList,
+    WorkQueue,
+    Aggregator,
+)
 
 files = [str(p) for p in pathlib.Path("docs").glob("*.md")] + ["README.md"]
-functions = [memlist, memfunc, memfile, time_taken, grid, random_grid]
+functions = [
+    memlist,
+    memfunc,
+    memfile,
+    memstack,
+    load_memfile,
+    time_taken,
+    grid,
+    random_grid,
+    ColumnarList,
+    WorkQueue,
+    Aggregator,
+    Runner.run_adaptive,
+]
 classes = [Runner]
 
 
@@ -1,3 +1,5 @@
+import pytest
+
 from memo import grid, random_grid
 
 
@@ -14,3 +16,20 @@ def test_random_grid():
     assert len(inputs) == 10
     assert all(["a" in i for i in inputs])
     assert all(["b" in i for i in inputs])
+
+
+def test_grid_base_seed():
+    settings = grid(a=range(5), b="abc", base_seed=42)
+    assert settings == grid(a=range(5), b="abc", base_seed=42)
+    assert len({s["seed"] for s in settings}) == 15
+    # The seed only depends on the setting, not on its position in the grid.
+    other = {
+        (s["a"], s["b"]): s["seed"] for s in grid(a=range(6), b="abc", base_seed=42)
+    }
+    assert all(other[(s["a"], s["b"])] == s["seed"] for s in settings)
+    assert settings != grid(a=range(5), b="abc", base_seed=43)
+
+
+def test_grid_base_seed_clash():
+    with pytest.raises(ValueError):
+        grid(a=[1, 2], seed=[1, 2], base_seed=42)
@@ -0,0 +1,36 @@
+import subprocess
+import sys
+
+import pytest
+
+# Generous upper bound for `import memo` in seconds, eagerly importing joblib
+# and rich used to take well over this on a typical machine.
+IMPORT_BUDGET = 0.15
+
+
+def run_python(code):
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+@pytest.mark.parametrize("module", ["joblib", "rich", "httpx", "orjson"])
+def test_heavy_modules_not_imported(module):
+    code = f"import sys; from memo import grid, memlist; assert '{module}' not in sys.modules"
+    run_python(code)
+
+
+def test_lazy_attributes_load():
+    code = "import sys; from memo import Runner; assert 'joblib' in sys.modules"
+    run_python(code)
+
+
+def test_import_time():
+    proc = run_python("import memo")
+    # The last line of `-X importtime` holds the cumulative time of `memo` in microseconds.
+    line = [ln for ln in proc.stderr.splitlines() if ln.endswith("| memo")][-1]
+    cumulative = int(line.split("|")[1]) / 1e6
+    assert cumulative < IMPORT_BUDGET
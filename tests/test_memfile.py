@@ -1,8 +1,11 @@
 import json
+import multiprocessing
+import os
+import pathlib
 import pytest
 import numpy as np
 
-from memo import memfile
+from memo import memfile, load_memfile
 
 
 def confirm_file_contents(fpath, data):
@@ -70,3 +73,182 @@ def test_base_skip(tmp_path):
     for i in range(1, 5):
         count_values(a=1)
     confirm_file_contents(filepath, [{"a": 1, "sum": 1}])
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+def test_segments_rotate(tmp_path, compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    filepath = f"{tmp_path}/file.jsonl"
+
+    @memfile(filepath=filepath, segment_rows=10, compression=compression)
+    def count_values(**kwargs):
+        return {"sum": sum(kwargs.values())}
+
+    for i in range(25):
+        count_values(a=i, b=1)
+
+    suffix = "gz" if compression == "gzip" else "zst"
+    assert len(list(tmp_path.glob(f"file.jsonl.*.{suffix}"))) == 2
+    assert len(list(tmp_path.glob("file.jsonl.*.idx"))) == 2
+    assert load_memfile(filepath) == [{"a": i, "b": 1, "sum": i + 1} for i in range(25)]
+
+
+def test_segments_rotate_bytes(tmp_path):
+    filepath = f"{tmp_path}/file.jsonl"
+
+    @memfile(filepath=filepath, segment_bytes=100)
+    def count_values(**kwargs):
+        return {"sum": sum(kwargs.values())}
+
+    for i in range(20):
+        count_values(a=i)
+
+    assert len(list(tmp_path.glob("file.jsonl.*.gz"))) > 1
+    assert [d["a"] for d in load_memfile(filepath)] == list(range(20))
+
+
+def test_segments_skip(tmp_path):
+    filepath = f"{tmp_path}/file.jsonl"
+
+    def count_values(**kwargs):
+        return {"sum": sum(kwargs.values())}
+
+    func = memfile(filepath=filepath, skip=True, segment_rows=3)(count_values)
+    for i in range(10):
+        func(a=i)
+    # A fresh decorator only has the files on disk to go by.
+    func = memfile(filepath=filepath, skip=True, segment_rows=3)(count_values)
+    for i in range(12):
+        func(a=i)
+    assert [d["a"] for d in load_memfile(filepath)] == list(range(12))
+
+
+def test_segments_on_existing_log(tmp_path):
+    filepath = f"{tmp_path}/file.jsonl"
+
+    def count_values(**kwargs):
+        return {"sum": sum(kwargs.values())}
+
+    plain = memfile(filepath=filepath)(count_values)
+    for i in range(5):
+        plain(a=i, b=1)
+
+    # Turning on segments must not log what the plain memfile already logged.
+    segmented = memfile(filepath=filepath, skip=True, segment_rows=3)(count_values)
+    for i in range(8):
+        segmented(a=i, b=1)
+    assert [d["a"] for d in load_memfile(filepath)] == list(range(8))
+
+
+def write_segmented(filepath, offset):
+    @memfile(filepath=filepath, segment_rows=7)
+    def count_values(**kwargs):
+        return {"sum": sum(kwargs.values())}
+
+    for i in range(50):
+        count_values(a=offset + i)
+
+
+def test_segments_many_processes(tmp_path):
+    filepath = f"{tmp_path}/file.jsonl"
+    ctx = multiprocessing.get_context("spawn")
+    workers = [
+        ctx.Process(target=write_segmented, args=(filepath, 1000 * i)) for i in range(4)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert all(w.exitcode == 0 for w in workers)
+    rows = load_memfile(filepath)
+    assert sorted(d["a"] for d in rows) == [
+        1000 * i + j for i in range(4) for j in range(50)
+    ]
+    n_indexed = sum(len(p.read_text().splitlines()) for p in tmp_path.glob("*.idx"))
+    assert n_indexed == 200
+
+
+def test_segments_skip_sees_other_writers(tmp_path):
+    filepath = f"{tmp_path}/file.jsonl"
+
+    def count_values(**kwargs):
+        return {"sum": sum(kwargs.values())}
+
+    first = memfile(filepath=filepath, skip=True, segment_rows=3)(count_values)
+    second = memfile(filepath=filepath, skip=True, segment_rows=3)(count_values)
+    for i in range(5):
+        first(a=i)
+    for i in range(5):
+        second(a=i)
+    assert len(load_memfile(filepath)) == 5
+
+
+class Crash(Exception):
+    pass
+
+
+@pytest.mark.parametrize("step", range(6))
+def test_segments_survive_crash_during_seal(tmp_path, monkeypatch, step):
+    filepath = f"{tmp_path}/file.jsonl"
+
+    def count_values(**kwargs):
+        return {"sum": sum(kwargs.values())}
+
+    func = memfile(filepath=filepath, skip=True, segment_rows=3)(count_values)
+    func(a=0)
+    func(a=1)
+
+    # Die on one of the renames or unlinks that the third write does to seal.
+    steps = []
+    rename, unlink = pathlib.Path.rename, pathlib.Path.unlink
+
+    def crashing(original):
+        def method(self, *args, **kwargs):
+            steps.append(self)
+            if len(steps) > step:
+                raise Crash()
+            return original(self, *args, **kwargs)
+
+        return method
+
+    monkeypatch.setattr(pathlib.Path, "rename", crashing(rename))
+    monkeypatch.setattr(pathlib.Path, "unlink", crashing(unlink))
+    with pytest.raises(Crash):
+        func(a=2)
+    monkeypatch.undo()
+
+    # A new process picks up where the crash left off.
+    func = memfile(filepath=filepath, skip=True, segment_rows=3)(count_values)
+    for i in range(6):
+        func(a=i)
+    assert [d["a"] for d in load_memfile(filepath)] == list(range(6))
+    assert len(list(tmp_path.glob("*.sealing*"))) == 0
+
+
+def test_segments_rebuild_missing_index(tmp_path):
+    filepath = f"{tmp_path}/file.jsonl"
+
+    def count_values(**kwargs):
+        return {"sum": sum(kwargs.values())}
+
+    func = memfile(filepath=filepath, skip=True, segment_rows=3)(count_values)
+    for i in range(4):
+        func(a=i)
+    os.remove(f"{filepath}.00000.idx")
+
+    func = memfile(filepath=filepath, skip=True, segment_rows=3)(count_values)
+    for i in range(6):
+        func(a=i)
+    assert [d["a"] for d in load_memfile(filepath)] == list(range(6))
+    assert os.path.exists(f"{filepath}.00000.idx")
+
+
+@pytest.mark.parametrize("segment_rows", [None, 3])
+def test_unknown_compression(tmp_path, segment_rows):
+    with pytest.raises(ValueError):
+        memfile(
+            filepath=f"{tmp_path}/file.jsonl",
+            segment_rows=segment_rows,
+            compression="bz2",
+        )
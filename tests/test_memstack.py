@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from memo import memstack, memlist, memfile, time_taken, ColumnarList
+
+
+def count_values(**kwargs):
+    return {"sum": sum(kwargs.values())}
+
+
+def test_same_as_stacked(tmp_path):
+    data_stacked, data_fused = [], []
+    file_stacked = f"{tmp_path}/stacked.jsonl"
+    file_fused = f"{tmp_path}/fused.jsonl"
+
+    stacked = memfile(filepath=file_stacked)(memlist(data=data_stacked)(count_values))
+    fused = memstack(sinks=[file_fused, data_fused])(count_values)
+
+    for a in range(3):
+        assert stacked(a=a, b=1) == fused(a=a, b=1)
+
+    assert data_stacked == data_fused
+    with open(file_stacked) as f1, open(file_fused) as f2:
+        assert [json.loads(x) for x in f1] == [json.loads(x) for x in f2]
+
+
+def test_sink_types():
+    data, columnar, called = [], ColumnarList(), []
+    func = memstack(sinks=[data, columnar, called.append])(count_values)
+    func(a=1, b=2)
+    assert data == [{"a": 1, "b": 2, "sum": 3}]
+    assert columnar == data
+    assert called == data
+
+
+def test_enrichers():
+    data = []
+    func = memstack(sinks=[data], enrichers=[time_taken()])(count_values)
+    assert func(a=1) == {"sum": 1}
+    assert set(data[0].keys()) == {"a", "sum", "time_taken"}
+
+
+def test_enricher_hooks_and_decorators():
+    calls, data = [], []
+
+    class Tag:
+        def __init__(self, name):
+            self.name = name
+
+        def before(self):
+            calls.append(f"before-{self.name}")
+            return self.name
+
+        def after(self, state, record):
+            calls.append(f"after-{state}")
+            record[state] = True
+
+    def doubled(func):
+        def wrapper(**kwargs):
+            return {k: 2 * v for k, v in func(**kwargs).items()}
+
+        return wrapper
+
+    enrichers = [Tag("outer"), doubled, Tag("inner"), time_taken()]
+    func = memstack(sinks=[data], enrichers=enrichers)(count_values)
+    func(a=1, b=2)
+    assert calls == ["before-outer", "before-inner", "after-inner", "after-outer"]
+    assert data[0]["sum"] == 6
+    assert data[0]["outer"] and data[0]["inner"]
+    assert "time_taken" in data[0]
+
+
+def test_bad_sink():
+    with pytest.raises(TypeError):
+        memstack(sinks=[1])
+
+
+def test_lists_get_their_own_copy():
+    first, second, seen = [], [], []
+    func = memstack(sinks=[first, second, seen.append])(count_values)
+    func(a=1, b=2)
+    first[0]["extra"] = 1
+    assert second == [{"a": 1, "b": 2, "sum": 3}]
+    assert seen == [{"a": 1, "b": 2, "sum": 3}]
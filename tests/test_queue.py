@@ -0,0 +1,137 @@
+import contextlib
+import multiprocessing
+import time
+
+import pytest
+
+from memo import memfile, memlist, grid, load_memfile, Runner, WorkQueue
+
+
+def add(a, b):
+    return {"sum": a + b}
+
+
+def start_worker(path, filepath):
+    func = memfile(filepath=filepath)(add)
+    WorkQueue(path, poll=0.05).work(func)
+
+
+def test_submit_is_idempotent(tmp_path):
+    queue = WorkQueue(f"{tmp_path}/queue.db")
+    assert queue.submit(grid(a=[1, 2], b=[1, 2])) == 4
+    assert queue.submit(grid(a=[1, 2, 3], b=[1, 2])) == 2
+    assert queue.progress() == {"pending": 6, "leased": 0, "done": 0, "failed": 0}
+
+
+def test_work_logs_to_sinks(tmp_path):
+    data = []
+    queue = WorkQueue(f"{tmp_path}/queue.db")
+    queue.submit(grid(a=[1, 2], b=[1, 2, 3], shuffle=False))
+    assert queue.work(memlist(data=data)(add)) == 6
+    assert len(data) == 6
+    assert queue.results() == data
+    assert queue.progress()["done"] == 6
+
+
+def test_dead_worker_is_requeued(tmp_path):
+    data = []
+    queue = WorkQueue(f"{tmp_path}/queue.db", lease=0.2, poll=0.05)
+    queue.submit(grid(a=[1, 2], b=[1, 2]))
+    # This worker claims a setting and then never reports back.
+    assert queue.claim("dead-worker") is not None
+    assert queue.work(memlist(data=data)(add)) == 4
+    assert queue.progress()["done"] == 4
+
+
+def test_failure_is_recorded(tmp_path):
+    def broken(a, b):
+        if a == 1:
+            raise ValueError("nope")
+        return {"sum": a + b}
+
+    queue = WorkQueue(f"{tmp_path}/queue.db")
+    queue.submit([{"a": 1, "b": 2}, {"a": 2, "b": 2}])
+    with pytest.warns(UserWarning, match="nope"):
+        assert queue.work(broken) == 1
+    assert queue.progress() == {"pending": 0, "leased": 0, "done": 1, "failed": 1}
+
+
+def test_raise_on_error(tmp_path):
+    def broken(a, b):
+        raise ValueError("nope")
+
+    queue = WorkQueue(f"{tmp_path}/queue.db")
+    queue.submit([{"a": 1, "b": 2}, {"a": 2, "b": 2}])
+    with pytest.raises(ValueError):
+        queue.work(broken, raise_on_error=True)
+    assert queue.progress()["failed"] == 1
+    assert queue.progress()["pending"] == 1
+
+
+def test_many_processes(tmp_path):
+    path, filepath = f"{tmp_path}/queue.db", f"{tmp_path}/results.jsonl"
+    WorkQueue(path).submit(grid(a=range(10), b=range(10)))
+    ctx = multiprocessing.get_context("spawn")
+    workers = [
+        ctx.Process(target=start_worker, args=(path, filepath)) for _ in range(3)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert all(w.exitcode == 0 for w in workers)
+    assert WorkQueue(path).progress()["done"] == 100
+    assert sorted((d["a"], d["b"]) for d in load_memfile(filepath)) == [
+        (a, b) for a in range(10) for b in range(10)
+    ]
+
+
+def test_runner_works_on_queue(tmp_path):
+    data = []
+    queue = WorkQueue(f"{tmp_path}/queue.db")
+    queue.submit(grid(a=range(5), b=range(5)))
+    Runner(backend="threading", n_jobs=-1).run(
+        func=memlist(data=data)(add), settings=queue, progbar=False
+    )
+    assert len(data) == 25
+
+
+def test_runner_rejects_manifest_with_queue(tmp_path):
+    queue = WorkQueue(f"{tmp_path}/queue.db")
+    runner = Runner(backend="threading", n_jobs=-1)
+    with pytest.raises(ValueError):
+        runner.run(add, settings=queue, manifest=f"{tmp_path}/manifest.txt")
+    with pytest.warns(UserWarning, match="Progress bar"):
+        runner.run(add, settings=queue)
+
+
+def test_expired_lease_cannot_complete(tmp_path):
+    queue = WorkQueue(f"{tmp_path}/queue.db", lease=0.1)
+    queue.submit([{"a": 1, "b": 2}])
+    idx, _ = queue.claim("slow-worker")
+    time.sleep(0.2)
+    # The lease ran out, so another worker takes over and finishes first.
+    assert queue.claim("fast-worker")[0] == idx
+    assert queue.complete(idx, "fast-worker", {"a": 1, "b": 2, "sum": 3})
+    assert not queue.complete(idx, "slow-worker", {"a": 1, "b": 2, "sum": -1})
+    assert not queue.fail(idx, "slow-worker", "too late")
+    assert queue.results() == [{"a": 1, "b": 2, "sum": 3}]
+    assert queue.progress()["done"] == 1
+
+
+def test_work_drops_result_after_lost_lease(tmp_path):
+    queue = WorkQueue(f"{tmp_path}/queue.db", lease=0.1, poll=0.05)
+    queue.submit([{"a": 1, "b": 2}])
+
+    def stolen(a, b):
+        # Simulate a stall long enough for another worker to take over.
+        time.sleep(0.2)
+        idx, _ = queue.claim("other")
+        queue.complete(idx, "other", {"a": a, "b": b, "sum": 0})
+        return {"sum": a + b}
+
+    # Stop heartbeats from renewing the lease during the stall.
+    queue._heartbeat = lambda idx, worker: contextlib.nullcontext()
+    with pytest.warns(UserWarning, match="lost the lease"):
+        assert queue.work(stolen) == 0
+    assert queue.results() == [{"a": 1, "b": 2, "sum": 0}]
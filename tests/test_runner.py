@@ -1,5 +1,11 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
 import pytest
 from memo import memlist, Runner, grid
+from memo._runner import _t_quantile
 
 
 @pytest.mark.parametrize(
@@ -89,3 +95,218 @@ def test_generator_progbar_warning():
 
         runner = Runner(backend="threading", n_jobs=-1)
         runner.run(func=count_values, settings=g, progbar=True)
+
+
+@pytest.mark.parametrize("progbar", [True, False])
+def test_manifest_resumes(tmp_path, progbar):
+    data = []
+    manifest = f"{tmp_path}/manifest.txt"
+
+    @memlist(data=data)
+    def count_values(**kwargs):
+        return {"sum": sum(kwargs.values())}
+
+    runner = Runner(backend="threading", n_jobs=-1)
+    runner.run(
+        func=count_values,
+        settings=grid(a=[1, 2], b=[1, 2, 3]),
+        progbar=progbar,
+        manifest=manifest,
+    )
+    assert len(data) == 6
+
+    # Running the same settings again dispatches nothing.
+    runner.run(
+        func=count_values,
+        settings=grid(a=[1, 2], b=[1, 2, 3]),
+        progbar=progbar,
+        manifest=manifest,
+    )
+    assert len(data) == 6
+
+    # Only the settings that are new get run.
+    runner.run(
+        func=count_values,
+        settings=grid(a=[1, 2, 3], b=[1, 2, 3]),
+        progbar=progbar,
+        manifest=manifest,
+    )
+    assert len(data) == 9
+    with open(manifest) as f:
+        assert len(f.readlines()) == 9
+
+
+def test_manifest_generator(tmp_path):
+    data = []
+    manifest = f"{tmp_path}/manifest.txt"
+
+    @memlist(data=data)
+    def count_values(**kwargs):
+        return {"sum": sum(kwargs.values())}
+
+    runner = Runner(backend="threading", n_jobs=-1)
+    for _ in range(2):
+        g = (s for s in grid(a=[1, 2], b=[1, 2]))
+        runner.run(func=count_values, settings=g, progbar=False, manifest=manifest)
+    assert len(data) == 4
+
+
+def test_base_seed_reproducible():
+    # Runner dispatches with `require="sharedmem"`, so joblib runs every backend
+    # on threads. Seeds are derived from the settings alone, which
+    # `test_settings_hash_is_stable_across_processes` covers for other processes.
+    def simulate(a, seed):
+        return {"draw": float(np.random.default_rng(seed).random())}
+
+    results = []
+    for settings in [grid(a=range(10)), grid(a=range(10))]:
+        data = []
+        runner = Runner(backend="threading", n_jobs=-1, base_seed=42)
+        runner.run(func=memlist(data=data)(simulate), settings=settings, progbar=False)
+        results.append({d["a"]: (d["seed"], d["draw"]) for d in data})
+    assert results[0] == results[1]
+    assert len({v[1] for v in results[0].values()}) == 10
+
+
+def test_base_seed_keeps_existing_seed():
+    data = []
+
+    @memlist(data=data)
+    def simulate(a, seed):
+        return {}
+
+    runner = Runner(backend="threading", n_jobs=-1, base_seed=42)
+    runner.run(func=simulate, settings=[{"a": 1, "seed": 7}], progbar=False)
+    assert data == [{"a": 1, "seed": 7}]
+
+
+def test_run_adaptive_stops_converged_settings():
+    data = []
+
+    @memlist(data=data)
+    def simulate(noise, repeat, seed):
+        rng = np.random.default_rng(seed)
+        return {"value": float(rng.normal(scale=noise))}
+
+    runner = Runner(backend="threading", n_jobs=-1, base_seed=42)
+    summary = runner.run_adaptive(
+        func=simulate,
+        settings=[{"noise": 0.0}, {"noise": 0.1}, {"noise": 100.0}],
+        key="value",
+        tolerance=0.1,
+        min_repeats=5,
+        max_repeats=40,
+    )
+    by_noise = {s["noise"]: s for s in summary}
+    assert by_noise[0.0]["n_repeats"] == 5 and by_noise[0.0]["converged"]
+    assert 5 <= by_noise[0.1]["n_repeats"] < 40 and by_noise[0.1]["converged"]
+    assert by_noise[100.0]["n_repeats"] == 40 and not by_noise[100.0]["converged"]
+    # Every repeat is logged as its own row.
+    assert len(data) == sum(s["n_repeats"] for s in summary)
+    assert sorted(d["repeat"] for d in data if d["noise"] == 100.0) == list(range(40))
+
+    # With a base seed the whole sweep is reproducible.
+    again = runner.run_adaptive(
+        func=simulate,
+        settings=[{"noise": 0.0}, {"noise": 0.1}, {"noise": 100.0}],
+        key="value",
+        tolerance=0.1,
+        min_repeats=5,
+        max_repeats=40,
+    )
+    assert again == summary
+
+
+def test_run_adaptive_without_repeat_key():
+    data = []
+
+    @memlist(data=data)
+    def simulate(a):
+        return {"value": a}
+
+    runner = Runner(backend="threading", n_jobs=-1)
+    summary = runner.run_adaptive(
+        func=simulate,
+        settings=grid(a=[1, 2]),
+        key="value",
+        tolerance=0.1,
+        repeat_key=None,
+    )
+    assert all(s["converged"] and s["n_repeats"] == 5 for s in summary)
+    assert all(set(d.keys()) == {"a", "value"} for d in data)
+
+
+def test_run_adaptive_warns_on_missing_key():
+    def simulate(a, repeat):
+        return {"value": a} if repeat % 2 == 0 else {}
+
+    runner = Runner(backend="threading", n_jobs=-1)
+    with pytest.warns(UserWarning, match="No finite `value`"):
+        summary = runner.run_adaptive(
+            func=simulate,
+            settings=[{"a": 1}],
+            key="value",
+            tolerance=0.1,
+            min_repeats=4,
+        )
+    # Only the even repeats count, so more than `min_repeats` are needed.
+    assert summary[0]["n_repeats"] >= 7 and summary[0]["converged"]
+
+
+def test_run_adaptive_rejects_taken_repeat_key():
+    runner = Runner(backend="threading", n_jobs=-1)
+    with pytest.raises(ValueError, match="repeat"):
+        runner.run_adaptive(
+            func=lambda a, repeat: {"b": a},
+            settings=[{"a": 1, "repeat": 3}],
+            key="b",
+            tolerance=0.1,
+        )
+
+
+@pytest.mark.parametrize(
+    "confidence, df, expected",
+    [
+        (0.95, 1, 12.706),
+        (0.95, 4, 2.776),
+        (0.99, 4, 4.604),
+        (0.95, 29, 2.045),
+        (0.95, 10_000, 1.960),
+    ],
+)
+def test_t_quantile(confidence, df, expected):
+    assert _t_quantile(confidence, df) == pytest.approx(expected, abs=1e-3)
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [{"f": len}, {"a": {"x", "y", "z"}}, {"a": {1: "x"}}, {"a": object()}],
+    ids=["function", "set", "int-key", "object"],
+)
+def test_manifest_rejects_unstable_settings(tmp_path, settings):
+    def count_values(**kwargs):
+        return {}
+
+    runner = Runner(backend="threading", n_jobs=-1)
+    with pytest.raises(TypeError, match="Can't hash settings"):
+        runner.run(
+            func=count_values,
+            settings=[settings],
+            progbar=False,
+            manifest=f"{tmp_path}/manifest.txt",
+        )
+
+
+def test_settings_hash_is_stable_across_processes():
+    code = "from memo._util import _hash_settings; print(_hash_settings({'a': 1, 'b': [1.5, 'x']}))"
+    hashes = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            env={**os.environ, "PYTHONHASHSEED": str(seed)},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in range(3)
+    }
+    assert len(hashes) == 1